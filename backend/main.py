@@ -2,26 +2,42 @@
 
 # main.py
 import os
-import json
 import logging
-import traceback
+import atexit
+import queue
 import time
 import asyncio
+import functools
+import hashlib
+import heapq
 import uuid
-from typing import Dict, Any, Optional, List, Tuple
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, Optional, List, Tuple, Awaitable, Callable
 from datetime import datetime, timedelta, date, time as dt_time
-from collections import defaultdict, deque
+from zoneinfo import ZoneInfo
+from collections import OrderedDict, deque
 from pydantic_settings import BaseSettings
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field
 
-import pytz
-from fastapi import FastAPI, HTTPException, Request, Depends, Query, APIRouter
-from fastapi.responses import JSONResponse
+import numpy as np
+import orjson
+from fastapi import FastAPI, HTTPException, Request, Response, Depends, Query, APIRouter
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from fastapi.middleware.cors import CORSMiddleware
 
 # Breeze SDK (synchronous). We'll call its methods from a threadpool.
+import breeze_connect.breeze_connect as breeze_sdk
+import http.cookiejar
+import requests
+from requests.adapters import HTTPAdapter
 from breeze_connect import BreezeConnect
-from schemas import ScreenerRequest, PaginatedResponse, SortOrder
+from schemas import ScreenerRequest, PaginatedResponse, SortOrder, ScreenerSortField
 from utils.market_utils import calculate_rsi_14, calculate_macd
 
 # ---------------------------
@@ -32,8 +48,12 @@ class Settings(BaseSettings):
     SESSION_EXPIRY_HOURS: int = 24
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_WINDOW: int = 3600  # seconds (server-side per-IP)
+    RATE_LIMIT_MAX_TRACKED_IPS: int = 100_000  # LRU bound on in-memory per-IP windows
     BREEZE_LIMIT_REQUESTS: int = 100
     BREEZE_LIMIT_WINDOW: int = 60  # seconds (Breeze doc: 100/min)
+    BREEZE_EXECUTOR_WORKERS: int = 32  # threads available to concurrent blocking SDK calls
+    BREEZE_HTTP_POOL_SIZE: int = 8  # keep-alive connections per Breeze session
+    BREEZE_HTTP_TIMEOUT: float = 30.0  # seconds; the SDK itself passes no timeout
     MARKET_CLOSE_HOUR: int = 15
     MARKET_CLOSE_MINUTE: int = 30  # treat >= 15:30 IST as market closed for the day
     MARKET_OPEN_HOUR: int = 9
@@ -44,6 +64,9 @@ class Settings(BaseSettings):
     SERVICE_API_KEY: Optional[str] = None
     SERVICE_API_SECRET: Optional[str] = None
     SERVICE_SESSION_TOKEN: Optional[str] = None
+    SERVICE_SESSION_TTL_HOURS: float = 12.0  # rebuild the cached service client after this long
+    # Optional shared store for the per-IP rate limiter (enforces one budget across workers)
+    REDIS_URL: Optional[str] = None
 
     class Config:
         env_file = ".env"
@@ -55,17 +78,49 @@ settings = Settings()
 # ---------------------------
 # Logging
 # ---------------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("app.log"),
-    ],
-)
+# Records are enqueued on the calling thread and written to stderr/app.log by a listener thread,
+# so disk I/O never blocks the event loop.
+_log_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s")
+_log_handlers: list[logging.Handler] = [logging.StreamHandler(), logging.FileHandler("app.log")]
+for _h in _log_handlers:
+    _h.setFormatter(_log_formatter)
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+log_listener = QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+# X-Request-ID of the request being served (set by the ASGI middleware); "-" outside requests
+request_id_ctx: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id; runs on the emitting thread, where the context is visible."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_ctx.get()
+        return True
+
+
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.addFilter(RequestIdFilter())
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))  # final formatting happens in the listener
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
 logger = logging.getLogger("breeze_api")
 
-IST = pytz.timezone("Asia/Kolkata")
+IST = ZoneInfo("Asia/Kolkata")
+
+# Coarse IST clock for checks that don't need sub-second precision (e.g. Cache-Control max-age)
+_now_cache: Tuple[float, Optional[datetime]] = (0.0, None)
+
+
+def now_ist_cached(resolution: float = 0.25) -> datetime:
+    """Return datetime.now(IST), refreshed at most once per `resolution` seconds."""
+    global _now_cache
+    mono = time.monotonic()
+    ts, cached = _now_cache
+    if cached is None or mono - ts >= resolution:
+        cached = datetime.now(IST)
+        _now_cache = (mono, cached)
+    return cached
 
 logger.info("Starting Breeze Trading API")
 logger.info(f"CORS origins: {settings.CORS_ORIGINS.split(',')}")
@@ -81,7 +136,7 @@ if __name__ == "__main__":
 # ---------------------------
 # FastAPI app + CORS
 # ---------------------------
-app = FastAPI(title="Breeze Trading API", version="2.2.0")
+app = FastAPI(title="Breeze Trading API", version="2.2.0", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -96,35 +151,104 @@ router = APIRouter()
 
 # ---------------------------
 # Server-side rate limiting (per IP)
-# NOTE: This is in-memory and per-process. For production multi-worker deployments use a shared store (Redis).
+# Uses a Redis sorted-set sliding window when REDIS_URL is configured so all workers share
+# one budget; otherwise falls back to the in-memory, per-process limiter below.
 # ---------------------------
-request_counts: Dict[str, deque] = defaultdict(lambda: deque())
+class IPWindow:
+    """
+    Fixed-capacity ring of the last RATE_LIMIT_REQUESTS admitted timestamps for one IP.
+    When full, buf[head] is the oldest admission, so one compare decides the sliding window.
+    """
+    __slots__ = ("buf", "head", "count")
+
+    def __init__(self, capacity: int):
+        self.buf = array("d", bytes(8 * max(capacity, 0)))
+        self.head = 0
+        self.count = 0
+
+    def admit(self, now_ts: float, window: float) -> bool:
+        capacity = len(self.buf)
+        if capacity <= 0:
+            return False  # RATE_LIMIT_REQUESTS=0 admits nothing
+        if self.count == capacity and now_ts - self.buf[self.head] < window:
+            return False
+        self.buf[self.head] = now_ts
+        self.head = (self.head + 1) % capacity
+        if self.count < capacity:
+            self.count += 1
+        return True
+
+
+# LRU-ordered so the least recently seen IP is evicted once RATE_LIMIT_MAX_TRACKED_IPS is reached
+request_counts: "OrderedDict[str, IPWindow]" = OrderedDict()
+
+# KEYS[1]=bucket, ARGV: now_ms, window_ms, limit, member. Returns 1 if allowed, 0 if limited.
+_RATE_LIMIT_LUA = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, tonumber(ARGV[1]) - tonumber(ARGV[2]))
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+redis_client: Any = None
+_redis_rate_limit_script: Any = None
+
+
+async def init_redis_rate_limiter() -> None:
+    global redis_client, _redis_rate_limit_script
+    if not settings.REDIS_URL:
+        return
+    try:
+        import redis.asyncio as aioredis
+        client = aioredis.from_url(settings.REDIS_URL)
+        await client.ping()
+        # register_script uses EVALSHA and transparently reloads the script if Redis lost it
+        _redis_rate_limit_script = client.register_script(_RATE_LIMIT_LUA)
+        redis_client = client
+        logger.info("Redis rate limiter enabled")
+    except Exception as e:
+        logger.warning(f"Redis rate limiter unavailable, using in-memory limiter: {e}")
+        logger.debug("Redis rate limiter init failure", exc_info=True)
+
+
+async def check_rate_limit_redis(client_ip: str) -> bool:
+    """Return True if under limit, False if exceeded (shared across workers)."""
+    now_ms = int(time.time() * 1000)
+    allowed = await _redis_rate_limit_script(
+        keys=[f"ratelimit:{client_ip}"],
+        args=[now_ms, settings.RATE_LIMIT_WINDOW * 1000, settings.RATE_LIMIT_REQUESTS, f"{now_ms}-{uuid.uuid4().hex[:8]}"],
+    )
+    return bool(allowed)
 
 
 def check_rate_limit_per_ip(client_ip: str) -> bool:
     """Return True if under limit, False if exceeded."""
-    now_ts = time.time()
-    window = settings.RATE_LIMIT_WINDOW
-    dq = request_counts[client_ip]
-    # Remove old timestamps
-    while dq and now_ts - dq[0] >= window:
-        dq.popleft()
-    if len(dq) >= settings.RATE_LIMIT_REQUESTS:
-        return False
-    dq.append(now_ts)
-    return True
+    ipw = request_counts.get(client_ip)
+    if ipw is None:
+        ipw = request_counts[client_ip] = IPWindow(settings.RATE_LIMIT_REQUESTS)
+        if len(request_counts) > settings.RATE_LIMIT_MAX_TRACKED_IPS:
+            request_counts.popitem(last=False)
+    else:
+        request_counts.move_to_end(client_ip)
+    return ipw.admit(time.time(), settings.RATE_LIMIT_WINDOW)
 
 
-@app.middleware("http")
-async def rate_limit_middleware(request: Request, call_next):
-    # Try to respect proxy headers for real client IP
-    client_ip = request.headers.get("X-Forwarded-For", "").split(",")[0].strip() or (
-        request.client.host if request.client else "unknown"
-    )
-    if not check_rate_limit_per_ip(client_ip):
-        logger.warning(f"Rate limit exceeded for IP: {client_ip}")
-        return JSONResponse(status_code=429, content={"detail": "Rate limit exceeded. Try again later."})
-    return await call_next(request)
+REDIS_RETRY_SECONDS = 30.0
+# Monotonic deadline before which Redis is skipped after a failure (one warning per outage window)
+_redis_down_until = 0.0
+
+
+async def allow_request(client_ip: str) -> bool:
+    global _redis_down_until
+    if redis_client is not None and time.monotonic() >= _redis_down_until:
+        try:
+            return await check_rate_limit_redis(client_ip)
+        except Exception as e:
+            _redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+            logger.warning(f"Redis rate limit check failed, using in-memory limiter for {REDIS_RETRY_SECONDS:.0f}s: {e}")
+    return check_rate_limit_per_ip(client_ip)
 
 
 # ---------------------------
@@ -132,41 +256,165 @@ async def rate_limit_middleware(request: Request, call_next):
 # ---------------------------
 from collections import defaultdict as _defaultdict
 
+class P2Quantile:
+    """
+    Streaming quantile estimate (Jain & Chlamtac P-square): five markers updated per
+    observation, so reading a percentile never needs the raw samples.
+    """
+    __slots__ = ("p", "q", "n", "np", "dn")
+
+    def __init__(self, p: float):
+        self.p = p
+        self.q: List[float] = []  # marker heights; raw samples until five are seen
+        self.n = [0, 1, 2, 3, 4]
+        self.np = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self.dn = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def update(self, x: float) -> None:
+        q, n = self.q, self.n
+        if len(q) < 5:
+            q.append(x)
+            if len(q) == 5:
+                q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        np_, dn = self.np, self.dn
+        for i in range(5):
+            np_[i] += dn[i]
+
+        for i in (1, 2, 3):
+            d = np_[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                s = 1 if d > 0 else -1
+                qp = q[i] + s / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + s * (q[i + s] - q[i]) / (n[i + s] - n[i])
+                q[i] = qp
+                n[i] += s
+
+    @property
+    def value(self) -> float:
+        q = self.q
+        if len(q) >= 5:
+            return q[2]
+        if not q:
+            return 0.0
+        ordered = sorted(q)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.p))]
+
+
+def _new_path_bucket() -> Dict[str, Any]:
+    return {"count": 0, "mean_ms": 0.0, "p50": P2Quantile(0.5), "p90": P2Quantile(0.9), "p99": P2Quantile(0.99)}
+
+
 request_metrics: Dict[str, Any] = {
     "total_requests": 0,
-    "per_path": _defaultdict(lambda: {"count": 0, "durations_ms": deque(maxlen=1000)}),
+    "per_path": _defaultdict(_new_path_bucket),
 }
 
 
-@app.middleware("http")
-async def request_id_and_timing_middleware(request: Request, call_next):
-    request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
-    start = time.perf_counter()
-    try:
-        response = await call_next(request)
-    finally:
-        duration_ms = (time.perf_counter() - start) * 1000.0
-        path = request.url.path
+def record_request_metrics(path: str, duration_ms: float) -> None:
+    request_metrics["total_requests"] += 1
+    bucket = request_metrics["per_path"][path]
+    bucket["count"] += 1
+    bucket["mean_ms"] += (duration_ms - bucket["mean_ms"]) / bucket["count"]
+    bucket["p50"].update(duration_ms)
+    bucket["p90"].update(duration_ms)
+    bucket["p99"].update(duration_ms)
+
+
+class RateAndMetricsMiddleware:
+    """Pure ASGI middleware: per-IP rate limiting, X-Request-ID and per-path timing.
+
+    Replaces two @app.middleware("http") layers, each of which wrapped every request
+    in BaseHTTPMiddleware's Request object and extra task/stream plumbing.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = forwarded_for = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+            elif name == b"x-forwarded-for":
+                forwarded_for = value.decode("latin-1")
+        request_id = request_id or str(uuid.uuid4())
+        # Try to respect proxy headers for real client IP
+        client = scope.get("client")
+        client_ip = (forwarded_for or "").split(",")[0].strip() or (client[0] if client else "unknown")
+        request_id_header = (b"x-request-id", request_id.encode("latin-1"))
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), request_id_header]
+            await send(message)
+
+        request_id_token = request_id_ctx.set(request_id)
+        start = time.perf_counter()
         try:
-            request_metrics["total_requests"] += 1
-            bucket = request_metrics["per_path"][path]
-            bucket["count"] += 1
-            bucket["durations_ms"].append(duration_ms)
-        except Exception:
-            pass
-    response.headers["X-Request-ID"] = request_id
-    return response
+            if await allow_request(client_ip):
+                await self.app(scope, receive, send_with_request_id)
+            else:
+                logger.warning(f"Rate limit exceeded for IP: {client_ip}")
+                response = ORJSONResponse(status_code=429, content={"detail": "Rate limit exceeded. Try again later."})
+                await response(scope, receive, send_with_request_id)
+        finally:
+            try:
+                record_request_metrics(scope["path"], (time.perf_counter() - start) * 1000.0)
+            except Exception:
+                pass
+            request_id_ctx.reset(request_id_token)
 
 
-@app.on_event("startup")
-async def on_startup():
-    # Load instruments into memory on startup
+app.add_middleware(RateAndMetricsMiddleware)
+
+
+async def warm_up(ready: asyncio.Event) -> None:
+    """Load instruments into memory and build the holiday calendar, then mark the app ready."""
     try:
         await load_instruments_into_memory()
         logger.info(f"Loaded {len(INSTRUMENTS)} instruments into memory")
     except Exception as e:
-        logger.error(f"Instrument load failed: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"Instrument load failed: {e}")
+    try:
+        await asyncio.to_thread(_trading_day_ordinals)
+    except Exception as e:
+        logger.warning(f"Trading calendar warm-up failed: {e}")
+    ready.set()
+
+
+@app.on_event("startup")
+async def on_startup():
+    # Breeze calls run outside breeze_lock, so size the default pool for parallel SDK calls
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=settings.BREEZE_EXECUTOR_WORKERS, thread_name_prefix="breeze")
+    )
+    # Instruments and the trading calendar load in the background; /readyz reports when done
+    app.state.ready = asyncio.Event()
+    app.state.warmup_task = asyncio.create_task(warm_up(app.state.ready))
+    await init_redis_rate_limiter()
+    app.state.janitor_task = asyncio.create_task(janitor())
     # Try to start APScheduler for daily compute
     try:
         from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -178,50 +426,68 @@ async def on_startup():
         logger.info("APScheduler started: daily screener build at 15:40 IST, Mon–Fri")
     except Exception as e:
         logger.warning(f"APScheduler not started: {e}")
-        logger.debug(traceback.format_exc())
+        logger.debug("APScheduler start failure", exc_info=True)
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    for task_name in ("warmup_task", "janitor_task"):
+        task = getattr(app.state, task_name, None)
+        if task is not None:
+            task.cancel()
+    if redis_client is not None:
+        try:
+            await redis_client.aclose()
+        except Exception:
+            pass
 
 
 # ---------------------------
 # Market status helper
 # ---------------------------
+MARKET_STATUS_TTL_SECONDS = 1.0
+# (monotonic computed_at, status) for calls without an explicit now_ist
+_market_status_cache: Tuple[float, Dict[str, Any]] = (float("-inf"), {})
+
+
 def get_market_status_backend(now_ist: Optional[datetime] = None) -> Dict[str, Any]:
+    global _market_status_cache
     if now_ist is None:
-        now_ist = datetime.now(IST)
+        mono = time.monotonic()
+        computed_at, cached = _market_status_cache
+        if mono - computed_at < MARKET_STATUS_TTL_SECONDS:
+            return dict(cached)
+        status = _compute_market_status(datetime.now(IST))
+        _market_status_cache = (mono, status)
+        return dict(status)
+    return _compute_market_status(now_ist)
+
+
+def _compute_market_status(now_ist: datetime) -> Dict[str, Any]:
     today = now_ist.date()
     is_holiday_today = is_market_holiday(today)
     is_weekend_today = is_weekend(today)
 
-    open_time = now_ist.replace(
-        hour=settings.MARKET_OPEN_HOUR,
-        minute=settings.MARKET_OPEN_MINUTE,
-        second=0,
-        microsecond=0,
-    )
-    close_cutoff = now_ist.replace(
-        hour=settings.MARKET_CLOSE_HOUR,
-        minute=settings.MARKET_CLOSE_MINUTE,
-        second=0,
-        microsecond=0,
-    )
+    minute_of_day = now_ist.hour * 60 + now_ist.minute
 
     closed_now = market_closed_now(now_ist)
     status = "open"
     if closed_now:
-        status = "pre-open" if now_ist < open_time and not (is_weekend_today or is_holiday_today) else "closed"
+        status = "pre-open" if minute_of_day < OPEN_MOD and not (is_weekend_today or is_holiday_today) else "closed"
 
     # determine next open time
     if status == "open":
         next_market_open_iso = None
     else:
         next_day = today
-        if now_ist >= close_cutoff:
+        if minute_of_day >= CLOSE_MOD:
             next_day = today + timedelta(days=1)
         # advance to next trading day
         while True:
             if not is_market_closed_today(next_day):
                 break
             next_day += timedelta(days=1)
-        next_open_dt = datetime.combine(next_day, dt_time(settings.MARKET_OPEN_HOUR, settings.MARKET_OPEN_MINUTE, 0)).astimezone(IST)
+        next_open_dt = datetime.combine(next_day, dt_time(settings.MARKET_OPEN_HOUR, settings.MARKET_OPEN_MINUTE, tzinfo=IST))
         next_market_open_iso = next_open_dt.isoformat()
 
     last_market_day = find_last_market_day(today)
@@ -260,12 +526,11 @@ async def healthz():
 
 @router.get("/readyz")
 async def readyz():
-    # Basic readiness: instruments loaded
-    try:
-        inst_count = len(INSTRUMENTS)
-        return {"status": "ready", "instruments": inst_count}
-    except Exception:
-        return JSONResponse(status_code=503, content={"status": "not_ready"})
+    # Ready once the startup warm-up (instruments + trading calendar) has finished
+    ready = getattr(app.state, "ready", None)
+    if ready is None or not ready.is_set():
+        return ORJSONResponse(status_code=503, content={"status": "not_ready"})
+    return {"status": "ready", "instruments": len(INSTRUMENTS)}
 
 
 @router.get("/metrics/basic")
@@ -277,39 +542,98 @@ async def basic_metrics():
     }
     per_path = request_metrics.get("per_path", {})
     for path, data in per_path.items():
-        durations = list(data.get("durations_ms", []))
-        if durations:
-            durations_sorted = sorted(durations)
-            p50 = durations_sorted[len(durations_sorted)//2]
-            p90 = durations_sorted[int(len(durations_sorted)*0.9)-1]
-            p99 = durations_sorted[int(len(durations_sorted)*0.99)-1] if len(durations_sorted) > 1 else durations_sorted[-1]
-            avg = sum(durations)/len(durations)
-        else:
-            p50 = p90 = p99 = avg = 0.0
         summary["paths"][path] = {
-            "count": data.get("count", 0),
-            "avg_ms": round(avg, 2),
-            "p50_ms": round(p50, 2),
-            "p90_ms": round(p90, 2),
-            "p99_ms": round(p99, 2),
+            "count": data["count"],
+            "avg_ms": round(data["mean_ms"], 2),
+            "p50_ms": round(data["p50"].value, 2),
+            "p90_ms": round(data["p90"].value, 2),
+            "p99_ms": round(data["p99"].value, 2),
         }
     return summary
 
 
+# ---------------------------
+# Pooled HTTP for the Breeze SDK
+# breeze_connect issues every REST call through module-level requests.get/post/put/delete
+# (no pooling, no timeout). Its `requests` name is replaced by BreezeRequests, which forwards
+# those four calls to the pooled Session of the BreezeConnect instance being called (set per
+# call by run_breeze_sync) and delegates every other attribute to the real requests module.
+# ---------------------------
+# Session of the BreezeConnect whose method is running on this thread; None outside run_breeze_sync
+breeze_http_ctx: ContextVar[Optional[requests.Session]] = ContextVar("breeze_http", default=None)
+
+
+def new_breeze_http() -> requests.Session:
+    """Keep-alive Session for one BreezeConnect instance; cookies are never persisted, like plain requests.get."""
+    session = requests.Session()
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.BREEZE_HTTP_POOL_SIZE, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class BreezeRequests:
+    """Stand-in for the `requests` module inside breeze_connect.breeze_connect."""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(requests, name)
+
+    def _request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", settings.BREEZE_HTTP_TIMEOUT)
+        session = breeze_http_ctx.get()
+        if session is None:
+            return requests.request(method, url, **kwargs)
+        return session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self._request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self._request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs: Any) -> requests.Response:
+        return self._request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs: Any) -> requests.Response:
+        return self._request("DELETE", url, **kwargs)
+
+
+breeze_sdk.requests = BreezeRequests()
+
+
+def new_breeze_client(api_key: str) -> BreezeConnect:
+    breeze = BreezeConnect(api_key=api_key)
+    breeze.http_session = new_breeze_http()
+    return breeze
+
+
+def close_breeze_client(breeze: BreezeConnect) -> None:
+    http_session = getattr(breeze, "http_session", None)
+    if http_session is not None:
+        http_session.close()
+
+
+def run_breeze_sync(sync_func, *args, **kwargs):
+    """Run a bound BreezeConnect method on this (worker) thread with its instance's HTTP session."""
+    token = breeze_http_ctx.set(getattr(getattr(sync_func, "__self__", None), "http_session", None))
+    try:
+        return sync_func(*args, **kwargs)
+    finally:
+        breeze_http_ctx.reset(token)
+
+
 # ---------------------------
 # Breeze API rate limiting (global in-process)
-# Using deque + asyncio.Lock to ensure safety within this process.
+# The lock only guards the deque bookkeeping; the SDK call itself runs outside it so
+# concurrent Breeze calls proceed in parallel up to the rate budget.
 # ---------------------------
 breeze_lock = asyncio.Lock()
-breeze_request_times: deque = deque()
+breeze_request_times: deque = deque(maxlen=settings.BREEZE_LIMIT_REQUESTS)
 
 
-async def breeze_call(sync_func, *args, **kwargs):
-    """
-    Safely call a synchronous BreezeConnect function:
-    - Enforce Breeze's rate limit in-process
-    - Run the sync call in a threadpool (async-friendly)
-    """
+async def _reserve_breeze_slot() -> None:
+    """Wait until a request fits in the Breeze window, then record it (reserving the slot)."""
     async with breeze_lock:
         now_ts = time.time()
         # Purge old timestamps outside the window
@@ -319,78 +643,109 @@ async def breeze_call(sync_func, *args, **kwargs):
             # Wait until oldest falls out of window
             wait_for = settings.BREEZE_LIMIT_WINDOW - (now_ts - breeze_request_times[0])
             wait_for = max(wait_for, 0.01)
-            logger.info(f"Breeze rate limit reached. Sleeping {wait_for:.2f}s")
+            logger.debug(f"Breeze rate limit reached. Sleeping {wait_for:.2f}s")
             await asyncio.sleep(wait_for)
             # purge again after sleeping
             now_ts = time.time()
             while breeze_request_times and now_ts - breeze_request_times[0] >= settings.BREEZE_LIMIT_WINDOW:
                 breeze_request_times.popleft()
+        breeze_request_times.append(now_ts)
 
-        loop = asyncio.get_running_loop()
-        try:
-            # Run the synchronous Breeze SDK function in a threadpool
-            result = await loop.run_in_executor(None, lambda: sync_func(*args, **kwargs))
-        except Exception:
-            logger.error("Exception while calling Breeze sync method")
-            logger.error(traceback.format_exc())
-            raise
-        # record timestamp for rate limit accounting
-        breeze_request_times.append(time.time())
-        return result
+
+async def breeze_call(sync_func, *args, **kwargs):
+    """
+    Safely call a synchronous BreezeConnect function:
+    - Enforce Breeze's rate limit in-process
+    - Run the sync call in a threadpool (async-friendly)
+    """
+    await _reserve_breeze_slot()
+    loop = asyncio.get_running_loop()
+    try:
+        # Run the synchronous Breeze SDK function in a threadpool
+        result = await loop.run_in_executor(None, functools.partial(run_breeze_sync, sync_func, *args, **kwargs))
+    except Exception:
+        logger.exception("Exception while calling Breeze sync method")
+        raise
+    if is_breeze_auth_error(result):
+        invalidate_service_breeze(getattr(sync_func, "__self__", None))
+    return result
 
 
 # ---------------------------
 # Data models
 # ---------------------------
 class SessionData(BaseModel):
+    # Stripping + min_length run inside pydantic-core, so blank values are rejected without a Python validator
+    model_config = ConfigDict(str_strip_whitespace=True, frozen=True)
+
     api_key: str = Field(..., min_length=1)
     api_secret: str = Field(..., min_length=1)
     session_token: str = Field(..., min_length=1)
 
-    @validator('api_key', 'api_secret', 'session_token')
-    def strip_not_empty(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Field cannot be empty")
-        return v.strip()
-
 
 class LogoutRequest(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True, frozen=True)
+
     api_session: str = Field(..., min_length=1)
 
 
 # ---------------------------
 # Session store
 # ---------------------------
+@dataclass(slots=True)
+class Session:
+    """A logged-in Breeze session held by SessionStore."""
+    api_key: str
+    api_secret: str
+    breeze: BreezeConnect
+    created_at: datetime
+    expires_at: datetime
+    expires_at_mono: float  # time.monotonic() deadline; what expiry checks actually compare
+    customer_details: Optional[Dict[str, Any]] = None
+
+
 class SessionStore:
-    """
-    In-memory session store. Each session entry:
-    {
-        "api_key": str,
-        "api_secret": str,
-        "breeze": BreezeConnect,
-        "created_at": datetime,
-        "expires_at": datetime,
-        "customer_details": dict (optional)
-    }
-    """
+    """In-memory session store: session_token -> Session."""
     def __init__(self):
-        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.sessions: Dict[str, Session] = {}
+        # Min-heap of (expires_at_mono, token); entries for removed/re-created sessions are skipped lazily
+        self._expiry_heap: list[tuple[float, str]] = []
+        # In-flight logins per (token, key, secret): concurrent identical /login calls share one Breeze
+        # handshake, while a call with different credentials is checked on its own
+        self._pending_logins: Dict[Tuple[str, str, str], asyncio.Task] = {}
+        # Guards writes only; reads are plain dict lookups (atomic on the event loop)
         self.lock = asyncio.Lock()
 
     async def add_session(self, session_token: str, api_key: str, api_secret: str):
         """Create Breeze instance, generate session, and fetch & store customer details."""
-        breeze = BreezeConnect(api_key=api_key)
+        key = (session_token, api_key, api_secret)
+        task = self._pending_logins.get(key)
+        if task is None:
+            # The store owns the login task, so one caller disconnecting doesn't cancel it for the others
+            task = asyncio.create_task(self._create_session(session_token, api_key, api_secret))
+            self._pending_logins[key] = task
+            task.add_done_callback(functools.partial(self._login_done, key))
+        await asyncio.shield(task)
+
+    def _login_done(self, key: Tuple[str, str, str], task: asyncio.Task) -> None:
+        if self._pending_logins.get(key) is task:
+            del self._pending_logins[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every waiter has gone away
+
+    async def _create_session(self, session_token: str, api_key: str, api_secret: str):
+        breeze = new_breeze_client(api_key)
         loop = asyncio.get_running_loop()
         try:
             # Breeze generate_session is synchronous, run in threadpool
-            await loop.run_in_executor(None, lambda: breeze.generate_session(api_secret=api_secret, session_token=session_token))
+            await loop.run_in_executor(None, functools.partial(run_breeze_sync, breeze.generate_session, api_secret=api_secret, session_token=session_token))
         except Exception:
-            logger.error("Failed to generate Breeze session during login.")
-            logger.error(traceback.format_exc())
+            logger.exception("Failed to generate Breeze session during login.")
             raise
 
         created = datetime.now(IST)
         expires_at = created + timedelta(hours=settings.SESSION_EXPIRY_HOURS)
+        expires_at_mono = time.monotonic() + settings.SESSION_EXPIRY_HOURS * 3600
         customer_details = None
         try:
             # Respect Breeze rate limits when fetching customer details
@@ -400,36 +755,48 @@ class SessionStore:
             logger.warning(f"Failed to fetch customer details during login: {e}")
 
         async with self.lock:
-            self.sessions[session_token] = {
-                "api_key": api_key,
-                "api_secret": api_secret,
-                "breeze": breeze,
-                "created_at": created,
-                "expires_at": expires_at,
-                "customer_details": customer_details,
-        }
+            replaced = self.sessions.get(session_token)
+            if replaced is not None and replaced.breeze is not breeze:
+                close_breeze_client(replaced.breeze)
+            self.sessions[session_token] = Session(
+                api_key=api_key,
+                api_secret=api_secret,
+                breeze=breeze,
+                created_at=created,
+                expires_at=expires_at,
+                expires_at_mono=expires_at_mono,
+                customer_details=customer_details,
+            )
+            heapq.heappush(self._expiry_heap, (expires_at_mono, session_token))
 
-    async def get_session(self, session_token: str) -> Optional[Dict[str, Any]]:
-        async with self.lock:
-            session = self.sessions.get(session_token)
-            if not session:
-                return None
-            if datetime.now(IST) > session["expires_at"]:
-                # expired
-                del self.sessions[session_token]
-                return None
-            return session
+    async def get_session(self, session_token: str) -> Optional[Session]:
+        session = self.sessions.get(session_token)
+        if not session:
+            return None
+        if time.monotonic() > session.expires_at_mono:
+            # expired
+            if self.sessions.pop(session_token, None) is not None:
+                close_breeze_client(session.breeze)
+            return None
+        return session
 
     async def remove_session(self, session_token: str):
         async with self.lock:
-            self.sessions.pop(session_token, None)
+            session = self.sessions.pop(session_token, None)
+        if session is not None:
+            close_breeze_client(session.breeze)
 
     async def cleanup_expired_sessions(self):
+        """Evict expired sessions; only heap entries that are already due are examined."""
         async with self.lock:
-            now = datetime.now(IST)
-            expired = [t for t, s in self.sessions.items() if now > s["expires_at"]]
-            for t in expired:
-                del self.sessions[t]
+            now = time.monotonic()
+            heap = self._expiry_heap
+            while heap and now > heap[0][0]:
+                expires_at_mono, token = heapq.heappop(heap)
+                session = self.sessions.get(token)
+                if session is not None and session.expires_at_mono == expires_at_mono:
+                    del self.sessions[token]
+                    close_breeze_client(session.breeze)
 
 
 session_store = SessionStore()
@@ -452,14 +819,16 @@ INDEX_LIST = [
 ]
 
 
+_INDEX_DISPLAY_NAMES = {
+    'NIFTY': 'NIFTY 50',
+    'SENSEX': 'S&P BSE SENSEX',
+    'BANKNIFTY': 'NIFTY BANK',
+    'FINNIFTY': 'NIFTY FINANCIAL SERVICES',
+}
+
+
 def get_index_display_name(symbol: str) -> str:
-    names = {
-        'NIFTY': 'NIFTY 50',
-        'SENSEX': 'S&P BSE SENSEX',
-        'BANKNIFTY': 'NIFTY BANK',
-        'FINNIFTY': 'NIFTY FINANCIAL SERVICES'
-    }
-    return names.get(symbol, symbol)
+    return _INDEX_DISPLAY_NAMES.get(symbol, symbol)
 
 
 def _to_float(v: Any) -> Optional[float]:
@@ -482,87 +851,136 @@ def calculate_change_percent(previous_close: Optional[float], current_close: Opt
 # ---------------------------
 # Holidays (2025) - load from JSON file trading_holidays_2025.json
 # ---------------------------
+_DATE_FMTS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d")
+
+
+@functools.lru_cache(maxsize=4096)
 def _parse_date_str(date_str: str) -> Optional[date]:
+    date_str = date_str.strip()
     try:
         # Accept ISO-like formats, take first 10 chars YYYY-MM-DD
-        core = date_str.strip()[:10]
-        return datetime.fromisoformat(core).date()
-    except Exception:
-        for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d"):
+        return date.fromisoformat(date_str[:10])
+    except ValueError:
+        for fmt in _DATE_FMTS:
             try:
-                return datetime.strptime(date_str.strip(), fmt).date()
-            except Exception:
+                return datetime.strptime(date_str, fmt).date()
+            except ValueError:
                 continue
     return None
 
 
+@functools.lru_cache(maxsize=4096)
+def _parse_candle_ts(dtstr: str) -> Optional[datetime]:
+    """Parse a Breeze candle 'datetime' field; timestamps repeat across calls for the same day."""
+    try:
+        iso = dtstr.replace(" ", "T")
+        if iso.endswith("Z"):
+            iso = iso.replace("Z", "+00:00")
+        return datetime.fromisoformat(iso)
+    except Exception:
+        try:
+            return datetime.fromisoformat(dtstr)
+        except Exception:
+            return None
+
+
 def _iso_utc(dt: datetime) -> str:
     # Return ISO string with Z
     s = dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
     return s
 
 
-def _load_holidays_2025() -> set[date]:
+@functools.cache
+def _load_holidays_2025() -> frozenset[date]:
     holidays: set[date] = set()
     try:
         json_path = os.path.join(os.path.dirname(__file__), "trading_holidays_2025.json")
-        with open(json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(json_path, "rb") as f:
+            data = orjson.loads(f.read())
         # Support two shapes:
-        # 1) Dict with keys: 'weekday_trading_holidays' (primary), 'weekend_non_trading_days' (informational)
+        # 1) Dict with keys: 'weekday_trading_holidays' (primary), 'weekend_non_trading_days' (informational;
+        #    weekends are already closed, so including them is harmless)
         # 2) Flat list of strings or dicts with a 'date' field
-        def add_date_str(s: str):
-            dt = _parse_date_str(s)
-            if dt:
-                holidays.add(dt)
-
+        date_strings: list[str] = []
         if isinstance(data, dict):
-            weekday_list = data.get("weekday_trading_holidays") or []
-            for item in weekday_list:
-                if isinstance(item, dict) and isinstance(item.get("date"), str):
-                    add_date_str(item["date"])
-            # Optionally include explicitly-listed weekend non-trading days (weekends are already closed)
-            weekend_list = data.get("weekend_non_trading_days") or []
-            for item in weekend_list:
-                if isinstance(item, dict) and isinstance(item.get("date"), str):
-                    add_date_str(item["date"])  # harmless; weekends are filtered elsewhere
+            for section in ("weekday_trading_holidays", "weekend_non_trading_days"):
+                date_strings += [
+                    item["date"] for item in (data.get(section) or [])
+                    if isinstance(item, dict) and isinstance(item.get("date"), str)
+                ]
         elif isinstance(data, list):
             for item in data:
                 if isinstance(item, str):
-                    add_date_str(item)
+                    date_strings.append(item)
                 elif isinstance(item, dict):
-                    for key in ("date", "date_iso", "holiday_date", "Date"):
-                        if key in item and isinstance(item[key], str):
-                            add_date_str(item[key])
-                            break
+                    s = next((item[k] for k in ("date", "date_iso", "holiday_date", "Date") if k in item and isinstance(item[k], str)), None)
+                    if s is not None:
+                        date_strings.append(s)
         else:
             logger.warning("Unexpected holidays JSON structure; expected dict or list")
+        holidays = {d for d in map(_parse_date_str, date_strings) if d is not None}
     except FileNotFoundError:
         logger.warning("trading_holidays_2025.json not found; proceeding with no holidays loaded")
     except Exception as e:
         logger.warning(f"Failed to load holidays JSON: {e}")
-        logger.debug(traceback.format_exc())
+        logger.debug("Holidays JSON load failure", exc_info=True)
     logger.info(f"Loaded {len(holidays)} holidays for 2025 from JSON")
-    return holidays
+    return frozenset(holidays)
 
 
-HOLIDAY_DATES_2025 = _load_holidays_2025()
+def get_holidays() -> frozenset[date]:
+    """
+    Holiday dates, parsed from JSON on first use and cached thereafter.
+    If the holiday cache is ever cleared, also clear _market_closed_bitmap/_trading_day_ordinals.
+    """
+    return _load_holidays_2025()
 
 
 def is_market_holiday(d: date) -> bool:
-    return d in HOLIDAY_DATES_2025
+    return d in get_holidays()
 
 
 def is_weekend(d: date) -> bool:
     return d.weekday() >= 5  # Sat=5, Sun=6
 
 
+# Range covered by the precomputed trading calendar; dates outside it fall back to weekday/holiday checks
+_CALENDAR_FIRST_ORDINAL = date(2020, 1, 1).toordinal()
+_CALENDAR_LAST_ORDINAL = date(2035, 12, 31).toordinal()
+
+
+@functools.cache
+def _market_closed_bitmap() -> bytearray:
+    """One byte per calendar day from _CALENDAR_FIRST_ORDINAL: 1 if weekend/holiday, else 0."""
+    holidays = get_holidays()
+    return bytearray(
+        1 if is_weekend(d) or d in holidays else 0
+        for d in map(date.fromordinal, range(_CALENDAR_FIRST_ORDINAL, _CALENDAR_LAST_ORDINAL + 1))
+    )
+
+
 def is_market_closed_today(d: date) -> bool:
+    i = d.toordinal() - _CALENDAR_FIRST_ORDINAL
+    bitmap = _market_closed_bitmap()
+    if 0 <= i < len(bitmap):
+        return bitmap[i] == 1
     return is_weekend(d) or is_market_holiday(d)
 
 
+@functools.cache
+def _trading_day_ordinals() -> array:
+    """Sorted ordinals of every trading day in the calendar range."""
+    return array("i", (
+        _CALENDAR_FIRST_ORDINAL + i for i, closed in enumerate(_market_closed_bitmap()) if not closed
+    ))
+
+
 def find_last_market_day(d: date) -> date:
     """Return the most recent trading day on or before d (skipping weekends/holidays)."""
+    ordinals = _trading_day_ordinals()
+    o = d.toordinal()
+    if ordinals and ordinals[0] <= o <= _CALENDAR_LAST_ORDINAL:
+        return date.fromordinal(ordinals[bisect_right(ordinals, o) - 1])
     counter = 0
     while True:
         if not is_market_closed_today(d):
@@ -575,32 +993,25 @@ def find_last_market_day(d: date) -> date:
 
 def find_previous_market_day(last_market_day: date) -> date:
     """Return the previous trading day before last_market_day."""
-    d = last_market_day - timedelta(days=1)
-    counter = 0
-    while True:
-        if not is_market_closed_today(d):
-            return d
-        d = d - timedelta(days=1)
-        counter += 1
-        if counter > 3650:
-            raise ValueError("Could not find previous market day within 10 years")
+    return find_last_market_day(last_market_day - timedelta(days=1))
+
+
+# Market open / close cutoffs as minutes since IST midnight
+OPEN_MOD = settings.MARKET_OPEN_HOUR * 60 + settings.MARKET_OPEN_MINUTE
+CLOSE_MOD = settings.MARKET_CLOSE_HOUR * 60 + settings.MARKET_CLOSE_MINUTE
 
 
 def market_closed_now(now_ist: datetime) -> bool:
     """
     Market considered closed if:
     - Today is a weekend/holiday OR
-    - Current IST time is before market open (09:30) OR
-    - Current IST time is >= market close cutoff (15:31)
+    - Current IST time is before market open (09:15) OR
+    - Current IST time is >= market close cutoff (15:30)
     """
-    today = now_ist.date()
-    if is_market_closed_today(today):
+    if is_market_closed_today(now_ist.date()):
         return True
-    open_cutoff = now_ist.replace(hour=settings.MARKET_OPEN_HOUR, minute=settings.MARKET_OPEN_MINUTE, second=0, microsecond=0)
-    if now_ist < open_cutoff:
-        return True
-    close_cutoff = now_ist.replace(hour=settings.MARKET_CLOSE_HOUR, minute=settings.MARKET_CLOSE_MINUTE, second=0, microsecond=0)
-    return now_ist >= close_cutoff
+    m = now_ist.hour * 60 + now_ist.minute
+    return m < OPEN_MOD or m >= CLOSE_MOD
 
 
 # ---------------------------
@@ -617,6 +1028,40 @@ SCREENER_CACHE: Dict[str, Any] = {
     "items": [],  # list[dict]
 }
 
+# Numeric screener fields held as float64 columns; None becomes NaN so every comparison drops it
+SCREENER_NUMERIC_FIELDS = ("close_price", "change_pct", "change_abs", "volume", "week_volume_diff_pct", "rsi_14", "macd")
+# (items list, row count, columns): rebuilt when the cache list is replaced or grows
+_screener_cols: Optional[Tuple[list, int, Dict[str, np.ndarray]]] = None
+
+
+def screener_columns(items: list[dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Struct-of-arrays view of SCREENER_CACHE["items"], aligned by row index, so screener
+    filters and sorts run as vectorized column operations instead of per-row Python.
+    """
+    global _screener_cols
+    n = len(items)
+    cached = _screener_cols
+    if cached is not None and cached[0] is items and cached[1] == n:
+        return cached[2]
+    rows = items[:n]
+    cols: Dict[str, np.ndarray] = {
+        field: np.fromiter(
+            (np.nan if (v := r.get(field)) is None else v for r in rows), dtype=np.float64, count=n
+        )
+        for field in SCREENER_NUMERIC_FIELDS
+    }
+    instruments = [r.get("instrument") or {} for r in rows]
+    cols["exchange_lc"] = np.array([(i.get("exchange_code") or "").lower() for i in instruments], dtype=str)
+    # -1 = unknown, 0 = inactive, 1 = active
+    cols["is_active"] = np.fromiter(
+        (-1 if (a := i.get("is_active")) is None else int(bool(a)) for i in instruments), dtype=np.int8, count=n
+    )
+    cols["short_upper"] = np.array([(i.get("short_name") or "").upper() for i in instruments], dtype=str)
+    cols["company_name"] = np.array([i.get("company_name") for i in instruments], dtype=object)
+    _screener_cols = (items, n, cols)
+    return cols
+
 
 def set_previous_close_cache(symbol: str, market_day: date, close: float):
     key = f"{symbol}:{market_day.isoformat()}"
@@ -646,11 +1091,37 @@ def get_today_close_cache(symbol: str, now_ist: datetime) -> Optional[float]:
     return None
 
 
+def _prune_caches(now_ist: datetime) -> None:
+    """Drop expired/stale entries from the in-memory market caches so they don't grow forever."""
+    for symbol in [k for k, v in today_close_cache.items() if now_ist > v.get("valid_until")]:
+        today_close_cache.pop(symbol, None)
+    stale_before = now_ist - timedelta(days=1)
+    for name in [k for k, v in index_snapshot_cache.items() if v.get("timestamp") is None or v["timestamp"] < stale_before]:
+        index_snapshot_cache.pop(name, None)
+    # previous closes are only looked up for recent market days; a week covers long holiday runs
+    oldest_day = now_ist.date() - timedelta(days=7)
+    for key in [k for k, v in previous_close_cache.items() if v.get("date") is None or v["date"] < oldest_day]:
+        previous_close_cache.pop(key, None)
+
+
+JANITOR_INTERVAL_SECONDS = 60
+
+
+async def janitor() -> None:
+    """Background housekeeping: expire sessions and prune caches off the request path."""
+    while True:
+        await asyncio.sleep(JANITOR_INTERVAL_SECONDS)
+        try:
+            await session_store.cleanup_expired_sessions()
+            _prune_caches(datetime.now(IST))
+        except Exception as e:
+            logger.warning(f"Janitor pass failed: {e}")
+
+
 # ---------------------------
 # Session dependency
 # ---------------------------
-async def get_session_or_401(api_session: str) -> Dict[str, Any]:
-    await session_store.cleanup_expired_sessions()
+async def get_session_or_401(api_session: str) -> Session:
     session_info = await session_store.get_session(api_session)
     if not session_info:
         raise HTTPException(status_code=401, detail="Invalid or expired session token")
@@ -662,9 +1133,8 @@ async def get_session_or_401(api_session: str) -> Dict[str, Any]:
 # ---------------------------
 @app.exception_handler(Exception)
 async def generic_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Unhandled exception for path {request.url.path}: {exc}")
-    logger.error(traceback.format_exc())
-    return JSONResponse(status_code=500, content={"detail": "Internal Server Error"})
+    logger.exception(f"Unhandled exception for path {request.url.path}: {exc}")
+    return ORJSONResponse(status_code=500, content={"detail": "Internal Server Error"})
 
 
 # ---------------------------
@@ -682,15 +1152,14 @@ async def login(data: SessionData):
         logger.info(f"Session created for token prefix: {data.session_token[:8]}...")
         # Return customer details directly to save a follow-up request
         session_info = await session_store.get_session(data.session_token)
-        customer_details = session_info.get("customer_details") if session_info else None
+        customer_details = session_info.customer_details if session_info else None
         return {
             "status": "session initialized",
             "api_session": data.session_token,
             "customer": customer_details,
         }
     except Exception as e:
-        logger.error(f"Error initializing session: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"Error initializing session: {e}")
         raise HTTPException(status_code=400, detail="Failed to initialize session")
 
 
@@ -701,35 +1170,32 @@ async def account_details(api_session: str):
     """
     try:
         session_info = await get_session_or_401(api_session)
-        if session_info.get("customer_details"):
-            return {"status": "success", "customer": session_info["customer_details"]}
+        if session_info.customer_details:
+            return {"status": "success", "customer": session_info.customer_details}
         # fallback: try to fetch live and update session
-        breeze = session_info["breeze"]
+        breeze = session_info.breeze
         try:
             details = await breeze_call(breeze.get_customer_details, api_session=api_session)
             # update stored session
-            async with session_store.lock:
-                if api_session in session_store.sessions:
-                    session_store.sessions[api_session]["customer_details"] = details
+            session_info.customer_details = details
             return {"status": "success", "customer": details}
         except Exception:
             raise HTTPException(status_code=500, detail="Failed to fetch customer details")
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in account_details: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"Error in account_details: {e}")
         raise HTTPException(status_code=500, detail="Failed to get account details")
 
 
 @router.get("/market/historical")
-async def get_historical_data(api_session: str, symbol: str, exchange: str, from_date: str, to_date: str):
+async def get_historical_data(request: Request, api_session: str, symbol: str, exchange: str, from_date: str, to_date: str):
     """
     Returns 30-minute candles for specified range and the 15:30 (or last) close.
     """
     try:
         session_info = await get_session_or_401(api_session)
-        breeze = session_info["breeze"]
+        breeze = session_info.breeze
         stock_code = SYMBOL_MAPPING.get(symbol, symbol)
         resp = await breeze_call(
             breeze.get_historical_data_v2,
@@ -746,152 +1212,214 @@ async def get_historical_data(api_session: str, symbol: str, exchange: str, from
             dtstr = candle.get("datetime")
             if not dtstr:
                 continue
-            try:
-                iso = dtstr.replace(" ", "T")
-                if iso.endswith("Z"):
-                    iso = iso.replace("Z", "+00:00")
-                candle_time = datetime.fromisoformat(iso)
-            except Exception:
-                try:
-                    candle_time = datetime.fromisoformat(dtstr)
-                except Exception:
+            if len(dtstr) == 19 and dtstr[10] in " T":
+                # Breeze sends naive IST "YYYY-MM-DD HH:MM:SS"; compare the clock text without parsing
+                hhmm = dtstr[11:16]
+            else:
+                candle_time = _parse_candle_ts(dtstr)
+                if candle_time is None:
                     continue
-            candle_time = candle_time.astimezone(IST)
-            if candle_time.hour == 15 and candle_time.minute == 30:
-                close_at_1530 = candle.get("close")
-                break
-            elif candle_time.hour > 15:
+                hhmm = candle_time.astimezone(IST).strftime("%H:%M")
+            if hhmm == "15:30" or hhmm[:2] > "15":
                 close_at_1530 = candle.get("close")
                 break
         if close_at_1530 is None and candles:
             close_at_1530 = candles[-1].get("close")
-        return {"Error": None, "Status": 200, "CloseAt1530": close_at_1530, "Candles": candles}
+        payload = {"Error": None, "Status": 200, "CloseAt1530": close_at_1530, "Candles": candles}
+        return _conditional_json(request, payload, market_data_max_age())
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error fetching historical data: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"Error fetching historical data: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get historical data for {symbol}")
 
 
-@router.get("/market/indices")
-async def get_market_indices(api_session: str):
+MARKET_DATA_TTL_OPEN = 10.0     # seconds
+MARKET_DATA_TTL_CLOSED = 300.0  # seconds
+MARKET_DATA_TTL_DEGRADED = 10.0  # seconds; payloads with missing closes are retried soon
+
+
+def market_data_max_age() -> int:
+    """Freshness window (seconds) for market data responses: short while trading, longer once closed."""
+    return int(MARKET_DATA_TTL_CLOSED if market_closed_now(now_ist_cached()) else MARKET_DATA_TTL_OPEN)
+
+
+def _conditional_json(request: Request, payload: Dict[str, Any], max_age: int) -> Response:
+    """Encode payload once, tag it with a weak ETag, and answer If-None-Match with 304."""
+    body = orjson.dumps(payload)
+    etag = f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    # private: responses sit behind a session token in the query string
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={max_age}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Short-TTL response cache for /market/indices. Index candles are 30-minute granularity, so
+# polling clients share one Breeze fan-out; concurrent misses await a single in-flight fetch.
+# The cache is process-wide, so the refresh runs on the service client rather than on whichever
+# caller missed first, and a payload with failed indices is only kept for a short window.
+_indices_cache: Dict[str, Any] = {"at": 0.0, "ttl": 0.0, "payload": None}
+_indices_inflight: Optional[asyncio.Task] = None
+
+
+async def _get_market_indices_cached(fallback_breeze: BreezeConnect) -> Dict[str, Any]:
+    global _indices_inflight
+    if _indices_cache["payload"] is not None and time.monotonic() - _indices_cache["at"] < _indices_cache["ttl"]:
+        return _indices_cache["payload"]
+    if _indices_inflight is None:
+        # Module-owned task: a disconnecting caller can't cancel the refresh other requests are waiting on
+        _indices_inflight = asyncio.create_task(_refresh_market_indices(fallback_breeze))
+        _indices_inflight.add_done_callback(_indices_refresh_done)
+    return await asyncio.shield(_indices_inflight)
+
+
+async def _refresh_market_indices(fallback_breeze: BreezeConnect) -> Dict[str, Any]:
+    breeze_inst = await get_service_breeze() or fallback_breeze
+    payload = await _compute_market_indices(breeze_inst)
+    complete = all(row.get("currentClose") is not None and row.get("previousClose") is not None for row in payload["data"])
+    ttl = market_data_max_age() if complete else min(MARKET_DATA_TTL_DEGRADED, market_data_max_age())
+    _indices_cache.update({"at": time.monotonic(), "ttl": ttl, "payload": payload})
+    return payload
+
+
+def _indices_refresh_done(task: asyncio.Task) -> None:
+    global _indices_inflight
+    if _indices_inflight is task:
+        _indices_inflight = None
+    if not task.cancelled():
+        task.exception()  # mark retrieved when every waiter has gone away
+
+
+async def _compute_market_indices(breeze_inst: BreezeConnect) -> Dict[str, Any]:
     """
     Get current market indices with change calculations.
     All candle fetching uses interval="30minute".
     """
-    try:
-        session_info = await get_session_or_401(api_session)
-        breeze_inst = session_info["breeze"]
-        now_ist = datetime.now(IST)
-        today_date = now_ist.date()
-
-        is_closed_now = market_closed_now(now_ist)
-        # Determine last market day and previous market day
-        # last_market_day is the most recent trading day on or before today
-        last_market_day = find_last_market_day(today_date)
-        # current snapshot day: if market closed now -> last_market_day, else use today
-        current_snapshot_day = last_market_day if is_closed_now else today_date
-        prev_market_day = find_previous_market_day(last_market_day)
-
-        async def fetch_last_candle(breeze, stock_code: str, exchange_code: str, day: date) -> Optional[Dict[str, Any]]:
-            from_dt = f"{day.isoformat()}T00:00:01.000Z"
-            to_dt = f"{day.isoformat()}T23:59:59.000Z"
-            data = await breeze_call(
-                breeze.get_historical_data_v2,
-                interval="30minute",
-                from_date=from_dt,
-                to_date=to_dt,
-                stock_code=stock_code,
-                exchange_code=exchange_code,
-                product_type="cash",
-            )
-            rows = data.get("Success") if isinstance(data, dict) else None
-            if not rows:
-                return None
-            return rows[-1]
-
-        # helper per-index to fetch prev & curr closes
-        async def process_index(idx: Dict[str, str]) -> Dict[str, Any]:
-            name = idx["name"]
-            exchange = idx["exchange"]
-            stock_code = SYMBOL_MAPPING.get(name, name)
-            prev_close: Optional[float] = None
-            curr_close: Optional[float] = None
-
-            # If market closed and we have a same-day cached snapshot, reuse it
-            cache_entry = index_snapshot_cache.get(name)
-            if (
-                cache_entry
-                and cache_entry.get("timestamp")
-                and cache_entry["timestamp"].date() == today_date
-                and is_closed_now
-            ):
-                prev_close = _to_float(cache_entry.get("previousClose"))
-                curr_close = _to_float(cache_entry.get("currentClose"))
-            else:
-                try:
-                    current_candle_task = fetch_last_candle(breeze_inst, stock_code, exchange, current_snapshot_day)
-                    prev_candle_task = fetch_last_candle(breeze_inst, stock_code, exchange, prev_market_day)
-                    current_candle, prev_candle = await asyncio.gather(current_candle_task, prev_candle_task)
-                    if not current_candle or not prev_candle:
-                        logger.warning(f"Missing candle data for {name}: current={bool(current_candle)} prev={bool(prev_candle)}")
-                    curr_close = _to_float(current_candle.get("close")) if current_candle else None
-                    prev_close = _to_float(prev_candle.get("close")) if prev_candle else None
-                except Exception as e:
-                    logger.error(f"Error fetching 30min last candles for {name}: {e}")
-                    logger.error(traceback.format_exc())
-
-            # Cache snapshot for closed market to avoid recompute on subsequent calls same day
-            if is_closed_now and curr_close is not None and prev_close is not None:
-                index_snapshot_cache[name] = {
-                    "currentClose": curr_close,
-                    "previousClose": prev_close,
-                    "timestamp": now_ist,
-                }
-
-            change, percent_change = calculate_change_percent(prev_close, curr_close)
-            is_positive = change is not None and change >= 0
 
-            return {
-                "symbol": name,
-                "displayName": get_index_display_name(name),
-                "previousClose": prev_close,
+    now_ist = datetime.now(IST)
+    today_date = now_ist.date()
+
+    is_closed_now = market_closed_now(now_ist)
+    # Determine last market day and previous market day
+    # last_market_day is the most recent trading day on or before today
+    last_market_day = find_last_market_day(today_date)
+    # current snapshot day: if market closed now -> last_market_day, else use today
+    current_snapshot_day = last_market_day if is_closed_now else today_date
+    prev_market_day = find_previous_market_day(last_market_day)
+
+    async def fetch_last_candles_by_day(breeze, stock_code: str, exchange_code: str, from_day: date, to_day: date) -> Dict[str, Dict[str, Any]]:
+        """One Breeze call for the whole [from_day, to_day] range; returns the last candle per YYYY-MM-DD."""
+        from_dt = f"{from_day.isoformat()}T00:00:01.000Z"
+        to_dt = f"{to_day.isoformat()}T23:59:59.000Z"
+        data = await breeze_call(
+            breeze.get_historical_data_v2,
+            interval="30minute",
+            from_date=from_dt,
+            to_date=to_dt,
+            stock_code=stock_code,
+            exchange_code=exchange_code,
+            product_type="cash",
+        )
+        rows = data.get("Success") if isinstance(data, dict) else None
+        last_by_day: Dict[str, Dict[str, Any]] = {}
+        for row in rows or []:
+            dtstr = row.get("datetime")
+            if dtstr:
+                # rows are chronological, so the final write per day is that day's last candle
+                last_by_day[str(dtstr)[:10]] = row
+        return last_by_day
+
+    # helper per-index to fetch prev & curr closes
+    async def process_index(idx: Dict[str, str]) -> Dict[str, Any]:
+        name = idx["name"]
+        exchange = idx["exchange"]
+        stock_code = SYMBOL_MAPPING.get(name, name)
+        prev_close: Optional[float] = None
+        curr_close: Optional[float] = None
+
+        # If market closed and we have a same-day cached snapshot, reuse it
+        cache_entry = index_snapshot_cache.get(name)
+        if (
+            cache_entry
+            and cache_entry.get("timestamp")
+            and cache_entry["timestamp"].date() == today_date
+            and is_closed_now
+        ):
+            prev_close = _to_float(cache_entry.get("previousClose"))
+            curr_close = _to_float(cache_entry.get("currentClose"))
+        else:
+            try:
+                last_by_day = await fetch_last_candles_by_day(breeze_inst, stock_code, exchange, prev_market_day, current_snapshot_day)
+                current_candle = last_by_day.get(current_snapshot_day.isoformat())
+                prev_candle = last_by_day.get(prev_market_day.isoformat())
+                if not current_candle or not prev_candle:
+                    logger.warning(f"Missing candle data for {name}: current={bool(current_candle)} prev={bool(prev_candle)}")
+                curr_close = _to_float(current_candle.get("close")) if current_candle else None
+                prev_close = _to_float(prev_candle.get("close")) if prev_candle else None
+            except Exception as e:
+                logger.exception(f"Error fetching 30min last candles for {name}: {e}")
+
+        # Cache snapshot for closed market to avoid recompute on subsequent calls same day
+        if is_closed_now and curr_close is not None and prev_close is not None:
+            index_snapshot_cache[name] = {
                 "currentClose": curr_close,
-                "change": change,
-                "percentChange": percent_change,
-                "isPositive": is_positive,
-                "marketClosed": is_closed_now,
-                "lastTradingDay": last_market_day.isoformat() if is_closed_now else None,
+                "previousClose": prev_close,
+                "timestamp": now_ist,
             }
 
-        # Run all indices concurrently
-        tasks = [process_index(idx) for idx in INDEX_LIST]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        data = []
-        for r in results:
-            if isinstance(r, Exception):
-                logger.error("One index task failed: %s", r)
-                data.append({
-                    "symbol": None,
-                    "displayName": None,
-                    "previousClose": None,
-                    "currentClose": None,
-                    "change": None,
-                    "percentChange": None,
-                    "isPositive": None,
-                    "marketClosed": None,
-                    "lastTradingDay": None,
-                })
-            else:
-                data.append(r)
-        return {"status": "success", "data": data}
+        change, percent_change = calculate_change_percent(prev_close, curr_close)
+        is_positive = change is not None and change >= 0
+
+        return {
+            "symbol": name,
+            "displayName": get_index_display_name(name),
+            "previousClose": prev_close,
+            "currentClose": curr_close,
+            "change": change,
+            "percentChange": percent_change,
+            "isPositive": is_positive,
+            "marketClosed": is_closed_now,
+            "lastTradingDay": last_market_day.isoformat() if is_closed_now else None,
+        }
+
+    # Run all indices concurrently
+    tasks = [process_index(idx) for idx in INDEX_LIST]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    data = []
+    for r in results:
+        if isinstance(r, Exception):
+            logger.error("One index task failed: %s", r)
+            data.append({
+                "symbol": None,
+                "displayName": None,
+                "previousClose": None,
+                "currentClose": None,
+                "change": None,
+                "percentChange": None,
+                "isPositive": None,
+                "marketClosed": None,
+                "lastTradingDay": None,
+            })
+        else:
+            data.append(r)
+    return {"status": "success", "data": data}
+
+
+@router.get("/market/indices")
+async def get_market_indices(request: Request, api_session: str):
+    """
+    Get current market indices with change calculations (served from a short-TTL cache).
+    """
+    try:
+        session_info = await get_session_or_401(api_session)
+        payload = await _get_market_indices_cached(session_info.breeze)
+        return _conditional_json(request, payload, market_data_max_age())
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error fetching market indices: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"Error fetching market indices: {e}")
         raise HTTPException(status_code=500, detail="Failed to get market indices")
 
 
@@ -912,7 +1440,7 @@ async def eod_screener(
     is_active: bool | None = True,
     min_rsi_14: float | None = None,
     max_rsi_14: float | None = None,
-    sort_field: str = Query("change_pct"),
+    sort_field: ScreenerSortField = Query("change_pct"),
     sort_order: SortOrder = Query(SortOrder.DESC),
 ):
     try:
@@ -926,77 +1454,73 @@ async def eod_screener(
                     min_week_vol_diff_pct = float(alt)
                 except Exception:
                     pass
-        # Filter
-        def passes(row: dict[str, Any]) -> bool:
-            price = row.get("close_price")
-            change_pct_val = row.get("change_pct")
-            vol = row.get("volume")
-            week_diff = row.get("week_volume_diff_pct")
-            ex = row.get("instrument", {}).get("exchange_code")
-            active = row.get("instrument", {}).get("is_active")
-            rsi = row.get("rsi_14")
-            if min_price is not None and (price is None or price < min_price):
-                return False
-            if max_price is not None and (price is None or price > max_price):
-                return False
-            if min_change_pct is not None and (change_pct_val is None or change_pct_val < min_change_pct):
-                return False
-            if max_change_pct is not None and (change_pct_val is None or change_pct_val > max_change_pct):
-                return False
-            if min_volume is not None and (vol is None or vol < min_volume):
-                return False
-            if min_week_vol_diff_pct is not None and (week_diff is None or week_diff < min_week_vol_diff_pct):
-                return False
-            if exchange and (not ex or ex.lower() != exchange.lower()):
-                return False
-            if is_active is not None and active is not None and active != is_active:
-                return False
-            if min_rsi_14 is not None and (rsi is None or rsi < min_rsi_14):
-                return False
-            if max_rsi_14 is not None and (rsi is None or rsi > max_rsi_14):
-                return False
-            return True
+        # Filter: one vectorized predicate per active filter; NaN (missing) never satisfies a bound
+        cols = screener_columns(items)
+        n = len(cols["close_price"])
+        mask = np.ones(n, dtype=bool)
+        for field, lo, hi in (
+            ("close_price", min_price, max_price),
+            ("change_pct", min_change_pct, max_change_pct),
+            ("volume", min_volume, None),
+            ("week_volume_diff_pct", min_week_vol_diff_pct, None),
+            ("rsi_14", min_rsi_14, max_rsi_14),
+        ):
+            if lo is not None:
+                mask &= cols[field] >= lo
+            if hi is not None:
+                mask &= cols[field] <= hi
+        if exchange:
+            mask &= cols["exchange_lc"] == exchange.lower()
+        if is_active is not None:
+            mask &= (cols["is_active"] == -1) | (cols["is_active"] == int(is_active))
 
         # Optional symbols whitelist (comma-separated short_names)
         symbols_param = request.query_params.get("symbols")
-        allowed: set[str] | None = None
         if symbols_param:
             allowed = {s.strip().upper() for s in symbols_param.split(",") if s.strip()}
-
-        filtered = []
-        for r in items:
             if allowed:
-                sn = (r.get("instrument", {}).get("short_name") or "").upper()
-                if sn not in allowed:
-                    continue
-            if passes(r):
-                filtered.append(r)
-
-        # Sort
-        def sort_key(r: dict[str, Any]):
-            mapping = {
-                "change_pct": r.get("change_pct"),
-                "change_abs": r.get("change_abs"),
-                "close_price": r.get("close_price"),
-                "volume": r.get("volume"),
-                "week_volume_diff_pct": r.get("week_volume_diff_pct"),
-                "rsi_14": r.get("rsi_14"),
-                "macd": r.get("macd"),
-                "company_name": r.get("instrument", {}).get("company_name"),
-            }
-            return mapping.get(sort_field, mapping["change_pct"]) or -1e18
+                mask &= np.isin(cols["short_upper"], np.array(list(allowed), dtype=str))
 
+        selected = np.flatnonzero(mask)
         reverse = sort_order == SortOrder.DESC
-        sorted_rows = sorted(filtered, key=sort_key, reverse=reverse)
 
-        total = len(sorted_rows)
-        page = sorted_rows[offset: offset + limit]
+        # Sort (stable, like sorted()); missing and zero values sort as -1e18.
+        # Only the first offset+limit rows are ever returned, so when that is a small share of the
+        # matches, select them in O(n) and sort just those instead of ordering every match.
+        total = len(selected)
+        k = offset + limit
+        top_k = k < total // 4
+        if sort_field == "company_name":
+            # Decorate once: gather the selected names in C, coerce missing to -1e18, sort positions by key
+            keys = [name or -1e18 for name in cols["company_name"][selected].tolist()]
+            if top_k:
+                # Documented equivalent to sorted(..., reverse=...)[:k], ties included
+                pick = heapq.nlargest if reverse else heapq.nsmallest
+                positions = pick(k, range(total), key=keys.__getitem__)
+            else:
+                positions = sorted(range(total), key=keys.__getitem__, reverse=reverse)
+            order = selected[positions].tolist()
+        else:
+            col = cols[sort_field][selected]
+            key = np.where(np.isnan(col) | (col == 0), -1e18, col)
+            if reverse:
+                key = -key
+            if top_k:
+                # Everything at or below the k-th smallest key, kept in row order so the stable
+                # argsort breaks ties at the boundary exactly as a full stable sort would
+                kth = np.partition(key, k - 1)[k - 1]
+                candidates = np.flatnonzero(key <= kth)
+                positions = candidates[np.argsort(key[candidates], kind="stable")][:k]
+            else:
+                positions = np.argsort(key, kind="stable")
+            order = selected[positions].tolist()
+
+        page = [items[i] for i in order[offset: offset + limit]]
         return PaginatedResponse(total=total, items=page, limit=limit, offset=offset)
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in eod_screener: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"Error in eod_screener: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch Screener data")
 
 
@@ -1019,11 +1543,10 @@ async def intraday_screener(
     if not breeze:
         raise HTTPException(status_code=503, detail="No Breeze session available")
 
-    # Optional symbols filter
-    allowed: set[str] | None = None
+    # Optional symbols filter; matches keep INSTRUMENTS order, compared on the upper-cased name cached at load
     if symbols:
         allowed = {s.strip().upper() for s in symbols.split(",") if s.strip()}
-        filtered = [i for i in INSTRUMENTS if (i.get("short_name") or "").upper() in allowed]
+        filtered = [i for i in INSTRUMENTS if i["short_name_upper"] in allowed]
     else:
         filtered = INSTRUMENTS
 
@@ -1038,28 +1561,26 @@ async def intraday_screener(
     today = datetime.now(IST).date()
     from_dt = _iso_utc(datetime(today.year, today.month, today.day, 0, 0, 1))
     to_dt = _iso_utc(datetime(today.year, today.month, today.day, 23, 59, 59))
+    # Exchange fallback order is fixed per request; build it once rather than inside each probe loop
+    exchanges = (exchange, "BSE" if exchange != "BSE" else "NSE")
+
+    async def probe(interval: str, from_date: str, code: str, ex: str) -> list[dict[str, Any]]:
+        data = await breeze_call(
+            breeze.get_historical_data_v2,
+            interval=interval,
+            from_date=from_date,
+            to_date=to_dt,
+            stock_code=code,
+            exchange_code=ex,
+            product_type="cash",
+        )
+        return (data.get("Success") if isinstance(data, dict) else None) or []
 
     async def one(inst: dict[str, Any]) -> dict[str, Any]:
         candidates = normalize_stock_code(inst.get("short_name"), inst.get("exchange_code"), inst.get("company_name"))
         try:
-            rows: list[dict[str, Any]] = []
-            for code in candidates:
-                for ex in [exchange, "BSE" if exchange != "BSE" else "NSE"]:
-                    data = await breeze_call(
-                        breeze.get_historical_data_v2,
-                        interval="30minute",
-                        from_date=from_dt,
-                        to_date=to_dt,
-                        stock_code=code,
-                        exchange_code=ex,
-                        product_type="cash",
-                    )
-                    tmp = data.get("Success") if isinstance(data, dict) else None
-                    if tmp:
-                        rows = tmp
-                        break
-                if rows:
-                    break
+            # Primary code/exchange first; fallbacks are probed together only on a miss
+            _, rows = await first_nonempty([functools.partial(probe, "30minute", from_dt, code, ex) for code in candidates for ex in exchanges])
             closes = [
                 _to_float(r.get("close")) for r in rows if _to_float(r.get("close")) is not None
             ]
@@ -1073,24 +1594,7 @@ async def intraday_screener(
             # Fallback to daily closes if intraday not available
             if curr is None or prev is None:
                 from_daily = _iso_utc(datetime(today.year, today.month, today.day, 0, 0, 1) - timedelta(days=15))
-                daily_rows: list[dict[str, Any]] = []
-                for code in candidates:
-                    for ex in [exchange, "BSE" if exchange != "BSE" else "NSE"]:
-                        data2 = await breeze_call(
-                            breeze.get_historical_data_v2,
-                            interval="1day",
-                            from_date=from_daily,
-                            to_date=to_dt,
-                            stock_code=code,
-                            exchange_code=ex,
-                            product_type="cash",
-                        )
-                        tmp2 = data2.get("Success") if isinstance(data2, dict) else None
-                        if tmp2:
-                            daily_rows = tmp2
-                            break
-                    if daily_rows:
-                        break
+                _, daily_rows = await first_nonempty([functools.partial(probe, "1day", from_daily, code, ex) for code in candidates for ex in exchanges])
                 daily_closes = [_to_float(r.get("close")) for r in daily_rows if _to_float(r.get("close")) is not None]
                 if len(daily_closes) >= 1 and curr is None:
                     curr = daily_closes[-1]
@@ -1167,8 +1671,7 @@ async def logout(request: LogoutRequest):
         await session_store.remove_session(request.api_session)
         return {"status": "logged out successfully"}
     except Exception as e:
-        logger.error(f"Error during logout: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"Error during logout: {e}")
         raise HTTPException(status_code=500, detail="Failed to logout")
 
 
@@ -1186,34 +1689,44 @@ async def health_check():
 # ---------------------------
 # Instruments import & EOD compute helpers (no DB)
 # ---------------------------
-async def load_instruments_into_memory() -> None:
-    json_path = os.path.join(os.path.dirname(__file__), "ScripMaster.json")
-    csv_path = os.path.join(os.path.dirname(__file__), "ScripMaster.csv")
-    data_list: list[dict[str, Any]] = []
-    if os.path.exists(json_path):
-        try:
-            with open(json_path, "r", encoding="utf-8") as f:
-                data_list = json.load(f)
-        except Exception as e:
-            logger.error(f"Failed to read ScripMaster.json: {e}")
-    elif os.path.exists(csv_path):
+def _scrip_master_source() -> Tuple[str, int]:
+    """Return (path, mtime_ns) of the ScripMaster file to load; JSON is preferred over CSV."""
+    base_dir = os.path.dirname(__file__)
+    for name in ("ScripMaster.json", "ScripMaster.csv"):
+        path = os.path.join(base_dir, name)
         try:
-            import csv
-            with open(csv_path, newline='', encoding="utf-8") as f:
-                reader = csv.reader(f)
-                for row in reader:
-                    if len(row) < 4:
-                        continue
-                    short, name, isin, exch_code = row[0], row[1], row[2], row[3]
-                    data_list.append({
-                        "ShortName": short,
-                        "CompanyName": name,
-                        "ISINCode": isin,
-                        "ExchangeCode": exch_code,
-                    })
-        except Exception as e:
-            logger.error(f"Failed to read ScripMaster.csv: {e}")
-    INSTRUMENTS.clear()
+            return path, os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+    return "", 0
+
+
+@functools.lru_cache(maxsize=1)
+def _parse_instruments(path: str, mtime_ns: int) -> Tuple[Dict[str, Any], ...]:
+    """
+    Parse and filter the ScripMaster file. Blocking; run via asyncio.to_thread.
+    Keyed by mtime so re-imports are free until the file changes on disk.
+    Read/parse errors propagate, so a failed load is never cached and the next call retries.
+    """
+    data_list: list[dict[str, Any]] = []
+    if path.endswith(".json"):
+        with open(path, "rb") as f:
+            data_list = orjson.loads(f.read())
+    elif path.endswith(".csv"):
+        import csv
+        with open(path, newline='', encoding="utf-8") as f:
+            reader = csv.reader(f)
+            for row in reader:
+                if len(row) < 4:
+                    continue
+                short, name, isin, exch_code = row[0], row[1], row[2], row[3]
+                data_list.append({
+                    "ShortName": short,
+                    "CompanyName": name,
+                    "ISINCode": isin,
+                    "ExchangeCode": exch_code,
+                })
+    instruments: list[Dict[str, Any]] = []
     # Restrict to test set for now: RELIANCE and TCS, with simple de-duplication by short_name
     allowed_short = {"RELIND", "RELIANCE", "TCS"}
     seen: set[str] = set()
@@ -1233,32 +1746,112 @@ async def load_instruments_into_memory() -> None:
         if fam in seen:
             continue
         seen.add(fam)
-        INSTRUMENTS.append({
+        instruments.append({
             "short_name": short_name,
             "company_name": company_name,
             "isin_code": isin_code,
             "exchange_code": exchange_code,
             "is_active": bool(exchange_code),
+            # Case-folded once here so per-request symbol filters don't re-uppercase every row
+            "short_name_upper": sn_upper,
         })
+    return tuple(instruments)
+
+
+async def load_instruments_into_memory() -> None:
+    # File I/O and JSON parsing happen in a worker thread so the event loop keeps serving
+    path, mtime_ns = _scrip_master_source()
+    try:
+        parsed = await asyncio.to_thread(_parse_instruments, path, mtime_ns)
+    except Exception as e:
+        # Keep whatever was loaded before; nothing is cached, so the next load retries the file
+        logger.error(f"Failed to read {os.path.basename(path)}: {e}")
+        return
+    INSTRUMENTS[:] = parsed
+
+
+# Service client is reused; generate_session is a full network handshake. It is rebuilt after
+# SERVICE_SESSION_TTL_HOURS, or on the next request once Breeze reports its session as invalid.
+_service_breeze: Optional[BreezeConnect] = None
+_service_breeze_at = 0.0  # time.monotonic() when _service_breeze logged in
+_service_breeze_lock = asyncio.Lock()
+
+
+def is_breeze_auth_error(data: Any) -> bool:
+    """True when a Breeze response rejects the session itself (expired/revoked key, bad credentials)."""
+    if not isinstance(data, dict) or data.get("Success"):
+        return False
+    if data.get("Status") in (401, 403):
+        return True
+    error = str(data.get("Error") or "").lower()
+    return any(marker in error for marker in ("session", "unauthori", "invalid user", "public key"))
+
+
+def invalidate_service_breeze(breeze: Optional[BreezeConnect]) -> None:
+    """Drop the cached service client if it is `breeze`, so the next get_service_breeze() logs in again."""
+    global _service_breeze
+    if breeze is not None and breeze is _service_breeze:
+        logger.warning("Service Breeze session rejected; it will be re-created on next use")
+        _service_breeze = None
+        close_breeze_client(breeze)
+
+
+def _service_breeze_fresh() -> bool:
+    return _service_breeze is not None and time.monotonic() - _service_breeze_at < settings.SERVICE_SESSION_TTL_HOURS * 3600
 
 
 async def get_service_breeze() -> Optional[BreezeConnect]:
+    global _service_breeze, _service_breeze_at
     if settings.SERVICE_API_KEY and settings.SERVICE_API_SECRET and settings.SERVICE_SESSION_TOKEN:
-        try:
-            breeze = BreezeConnect(api_key=settings.SERVICE_API_KEY)
-            loop = asyncio.get_running_loop()
-            await loop.run_in_executor(None, lambda: breeze.generate_session(api_secret=settings.SERVICE_API_SECRET, session_token=settings.SERVICE_SESSION_TOKEN))
-            return breeze
-        except Exception:
-            logger.error("Failed to init service Breeze session")
-            logger.error(traceback.format_exc())
-            return None
+        if _service_breeze_fresh():
+            return _service_breeze
+        async with _service_breeze_lock:
+            if _service_breeze_fresh():
+                return _service_breeze
+            try:
+                breeze = new_breeze_client(settings.SERVICE_API_KEY)
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, functools.partial(run_breeze_sync, breeze.generate_session, api_secret=settings.SERVICE_API_SECRET, session_token=settings.SERVICE_SESSION_TOKEN))
+                stale, _service_breeze, _service_breeze_at = _service_breeze, breeze, time.monotonic()
+                if stale is not None:
+                    close_breeze_client(stale)
+                return breeze
+            except Exception:
+                logger.exception("Failed to init service Breeze session")
+                return None
     async with session_store.lock:
         for token, sess in session_store.sessions.items():
-            return sess.get("breeze")
+            return sess.breeze
     return None
 
 
+async def first_nonempty(probes: list[Callable[[], Awaitable[list[dict[str, Any]]]]]) -> tuple[int, list[dict[str, Any]]]:
+    """
+    Return (index, rows) for the first probe, in list order, that yields rows — what a sequential
+    try-each-in-turn loop would pick, including re-raising a higher-priority probe's error.
+    The primary probe runs alone, since it usually hits and every probe spends a Breeze rate-limit
+    slot; only on a miss are the fallbacks started together, and undecided ones cancelled once settled.
+    """
+    if not probes:
+        return -1, []
+    rows = await probes[0]()
+    if rows:
+        return 0, rows
+    tasks = [asyncio.ensure_future(p()) for p in probes[1:]]
+    try:
+        for i, task in enumerate(tasks, start=1):
+            rows = await task
+            if rows:
+                return i, rows
+        return -1, []
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # mark retrieved; only the first error in order is surfaced
+
+
 async def fetch_daily_series(breeze: BreezeConnect, stock_code: str, exchange: str, from_date: str, to_date: str) -> list[dict[str, Any]]:
     data = await breeze_call(
         breeze.get_historical_data_v2,
@@ -1296,8 +1889,9 @@ def _to_float_safe(v: Any) -> Optional[float]:
         return None
 
 
-def normalize_stock_code(short_name: str | None, exchange_code: str | None, company_name: str | None) -> list[str]:
-    """Generate Breeze stock_code candidates for an instrument (order matters)."""
+@functools.lru_cache(maxsize=4096)
+def normalize_stock_code(short_name: str | None, exchange_code: str | None, company_name: str | None) -> tuple[str, ...]:
+    """Generate Breeze stock_code candidates for an instrument (order matters). Memoized; returns a tuple."""
     cands: list[str] = []
     def add(code: Optional[str]):
         if not code:
@@ -1328,7 +1922,7 @@ def normalize_stock_code(short_name: str | None, exchange_code: str | None, comp
         cleaned = ''.join(ch for ch in code if ch.isalnum())
         if cleaned and cleaned not in filtered:
             filtered.append(cleaned)
-    return filtered
+    return tuple(filtered)
 
 
 def add_row_to_cache(instrument: dict, trade_date: date, payload: dict[str, Any]) -> None:
@@ -1360,20 +1954,11 @@ async def process_instrument_compute(breeze: BreezeConnect, inst: dict, target_d
     from_day = target_day - timedelta(days=400)
     from_date = f"{from_day.isoformat()}T00:00:01.000Z"
     to_date = f"{target_day.isoformat()}T23:59:59.000Z"
-    daily_rows: list[dict[str, Any]] = []
-    used_exchange: Optional[str] = None
-    used_code: Optional[str] = None
-    for code in code_candidates:
-        for ex in exchanges:
-            daily_rows = await fetch_daily_series(breeze, code, ex, from_date, to_date)
-            if daily_rows:
-                used_exchange = ex
-                used_code = code
-                break
-        if daily_rows:
-            break
+    pairs = [(code, ex) for code in code_candidates for ex in exchanges]
+    used, daily_rows = await first_nonempty([functools.partial(fetch_daily_series, breeze, code, ex, from_date, to_date) for code, ex in pairs])
     if not daily_rows:
         return
+    used_code, used_exchange = pairs[used]
     closes: list[float] = []
     volumes: list[int] = []
     last_close: Optional[float] = None
@@ -1381,24 +1966,11 @@ async def process_instrument_compute(breeze: BreezeConnect, inst: dict, target_d
     today_volume: Optional[int] = None
     last_date: Optional[date] = None
 
-    def parse_dt(dtstr: str) -> Optional[datetime]:
-        if not dtstr:
-            return None
-        try:
-            iso = dtstr.replace(" ", "T")
-            if iso.endswith("Z"):
-                iso = iso.replace("Z", "+00:00")
-            return datetime.fromisoformat(iso)
-        except Exception:
-            try:
-                return datetime.fromisoformat(dtstr)
-            except Exception:
-                return None
-
     for row in daily_rows:
         c = _to_float_safe(row.get("close"))
         v = row.get("volume")
-        dt = parse_dt(row.get("datetime"))
+        dtstr = row.get("datetime")
+        dt = _parse_candle_ts(dtstr) if dtstr else None
         if c is None or not dt:
             continue
         closes.append(c)
@@ -1479,8 +2051,7 @@ async def build_screener_cache_job():
             await asyncio.gather(*(run_one(i) for i in chunk))
         logger.info("Screener cache built: %d items", len(SCREENER_CACHE["items"]))
     except Exception as e:
-        logger.error(f"Screener build error: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"Screener build error: {e}")
 
 
 @router.post("/admin/import-instruments")
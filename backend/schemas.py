@@ -1,5 +1,5 @@
 from datetime import date, datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
 from pydantic import BaseModel, Field, validator
 from enum import Enum
 
@@ -7,6 +7,17 @@ class SortOrder(str, Enum):
     ASC = "asc"
     DESC = "desc"
 
+ScreenerSortField = Literal[
+    "change_pct",
+    "change_abs",
+    "close_price",
+    "volume",
+    "week_volume_diff_pct",
+    "rsi_14",
+    "macd",
+    "company_name",
+]
+
 class EODSnapshotBase(BaseModel):
     trade_date: date
     open_price: Optional[float] = None
@@ -77,7 +88,7 @@ class ScreenerFilter(BaseModel):
     is_active: Optional[bool] = None
 
 class ScreenerSort(BaseModel):
-    field: str = "change_pct"
+    field: ScreenerSortField = "change_pct"
     order: SortOrder = SortOrder.DESC
 
 class ScreenerRequest(BaseModel):
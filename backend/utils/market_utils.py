@@ -1,9 +1,9 @@
 from datetime import date, datetime, time, timedelta
-import pytz
+from zoneinfo import ZoneInfo
 from typing import Optional, List
 
 # Timezone for Indian markets
-IST = pytz.timezone('Asia/Kolkata')
+IST = ZoneInfo('Asia/Kolkata')
 
 # Market hours
 MARKET_OPEN_TIME = time(9, 15)   # 9:15 AM IST
@@ -61,22 +61,35 @@ def ema(values: List[float], period: int) -> Optional[List[float]]:
 
 
 def calculate_macd(closes: List[float]) -> tuple[Optional[float], Optional[float], Optional[float]]:
-    if len(closes) < 26:
-        return None, None, None
-    ema12_full = ema(closes, 12)
-    ema26_full = ema(closes, 26)
-    if not ema12_full or not ema26_full:
+    """
+    MACD(12, 26, 9) of the last close, in one pass over closes without materializing
+    the EMA series. Same seeding (SMA) and recurrence as ema().
+    """
+    n = len(closes)
+    if n < 26:
         return None, None, None
-    # Align lengths
-    overlap = min(len(ema12_full), len(ema26_full))
-    diffs = [ema12_full[-overlap + i] - ema26_full[-overlap + i] for i in range(overlap)]
-    signal_full = ema(diffs, 9)
-    if not signal_full:
+    k12, k26, k9 = 2 / 13, 2 / 27, 2 / 10
+    ema12 = sum(closes[:12]) / 12
+    for price in closes[12:26]:
+        ema12 = price * k12 + ema12 * (1 - k12)
+    ema26 = sum(closes[:26]) / 26
+    macd_val = ema12 - ema26
+    # The signal line is seeded with the SMA of the first 9 MACD values
+    seed = [macd_val]
+    signal_val = None
+    for price in closes[26:]:
+        ema12 = price * k12 + ema12 * (1 - k12)
+        ema26 = price * k26 + ema26 * (1 - k26)
+        macd_val = ema12 - ema26
+        if signal_val is not None:
+            signal_val = macd_val * k9 + signal_val * (1 - k9)
+        else:
+            seed.append(macd_val)
+            if len(seed) == 9:
+                signal_val = sum(seed) / 9
+    if signal_val is None:
         return None, None, None
-    macd_val = diffs[-1]
-    signal_val = signal_full[-1]
-    hist_val = macd_val - signal_val
-    return macd_val, signal_val, hist_val
+    return macd_val, signal_val, macd_val - signal_val
 
 def get_last_trading_day(current_date: Optional[date] = None) -> date:
     """